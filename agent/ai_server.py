@@ -1,10 +1,21 @@
 """Container AI Server - HTTP interface for CloudRun (Async Task Pattern)"""
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Optional
 from datetime import datetime
+from collections import deque
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+import anyio
+import asyncio
 import logging
+import orjson
+import queue as queue_lib
+import os
+import sqlite3
 import sys
+import time
 import uuid
 import traceback
 
@@ -12,11 +23,19 @@ from agent.models import AnthropicModelProvider
 from agent.deep_agent import RefactorAgent
 
 # 配置 logging 輸出到 stdout（確保日誌可被收集）
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
+# stdout 寫入經由 QueueListener 在背景執行緒完成，事件循環只付入隊成本
+# 注意：root logger 手動配置，不用 basicConfig——它會給 QueueHandler
+# 掛上預設 formatter，導致 listener 端二次格式化
+_log_queue: queue_lib.Queue = queue_lib.Queue(-1)
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(
+    logging.Formatter('[%(asctime)s] [%(levelname)s] %(message)s')
 )
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, _stdout_handler)
+_log_listener.start()
 
 app = FastAPI(title="AI Server", version="1.0.0")
 logger = logging.getLogger(__name__)
@@ -29,18 +48,262 @@ class TaskStatus:
     FAILED = "failed"
     STOPPED = "stopped"  # 手動停止
 
+# 每個任務最多保留的日誌筆數（ring buffer，超過即丟棄最舊的）
+MAX_TASK_LOG_ENTRIES = 10_000
+
+# 已結束任務的保留時間（秒），超過即由背景 sweeper 清除
+MAX_TASK_AGE = 3600
+
+# 背景清理的掃描間隔（秒）
+SWEEP_INTERVAL = 60
+
 # 內存任務儲存（單容器內有效）
 tasks: Dict[str, Dict] = {}
 
-# 日誌儲存（用於 stream）
-task_logs: Dict[str, list] = {}
+# 日誌儲存（用於 stream），每個任務一個固定容量的 ring buffer
+task_logs: Dict[str, deque] = {}
 
 # 停止標誌（用於中斷執行）
 stop_flags: Dict[str, bool] = {}
 
+# 每個任務的 SSE 訂閱者（fan-out pub/sub，每個消費者一個 Queue）
+task_subscribers: Dict[str, list] = {}
+
+# 單一訂閱者 Queue 的容量（滿載時丟最舊，避免慢速消費者阻塞發佈端）
+SUBSCRIBER_QUEUE_SIZE = 1024
+
+# ai_content 合併窗口（秒）：窗口內的連續 token 合併成單一 SSE frame，
+# 省下逐 token 的 framing 開銷；結構化事件不合併以維持低延遲
+AI_CONTENT_COALESCE_WINDOW = 0.02
+
+# 任務結束的 sentinel（發佈給訂閱者，通知串流結束）
+_TASK_DONE = object()
+
+# 主事件循環（startup 時記錄，供 worker thread 發送通知）
+_main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# 終止狀態集合（任務結束判斷用）
+TERMINAL_STATUSES = (TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.STOPPED)
+
+# Agent 併發上限（獨立於 request handler 的 threadpool，避免互相排擠）
+MAX_AGENTS = int(os.getenv("MAX_AGENTS", 8))
+
+# 專用的 CapacityLimiter（startup 時建立，綁定主事件循環）
+_agent_limiter: Optional[anyio.CapacityLimiter] = None
+
+# 任務持久化路徑（SQLite WAL，容器重啟後任務狀態不遺失）
+TASK_DB_PATH = os.getenv("TASK_DB_PATH", "/workspace/.agent_tasks.db")
+
+# SQLite 連線（startup 時建立；路徑不可寫時為 None，退回純內存模式）
+_task_db: Optional[sqlite3.Connection] = None
+
+# 公平排程：每個使用者一個佇列，dispatcher 以 round-robin 輪流取任務，
+# 避免單一使用者連續提交大量任務獨占 worker
+user_queues: Dict[str, deque] = {}
+
+# round-robin 的使用者順序
+_rr_users: deque = deque()
+
+# 有任務待執行的訊號（worker 等待用）
+_work_available: Optional[asyncio.Event] = None
+
+# 等待超過此秒數的任務跳過 round-robin 直接優先出隊（aging，避免飢餓）
+QUEUE_AGING_THRESHOLD = int(os.getenv("QUEUE_AGING_THRESHOLD", 300))
+
+# user_id 未提供時的預設分組
+DEFAULT_USER_GROUP = "anonymous"
+
+
+def _init_task_db() -> Optional[sqlite3.Connection]:
+    """建立任務持久化資料庫（WAL 模式，單容器內寫入量極小）"""
+    try:
+        conn = sqlite3.connect(TASK_DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL)"
+        )
+        conn.commit()
+        return conn
+    except sqlite3.Error as e:
+        # 路徑不可寫（例如本地開發沒有 /workspace）時退回純內存模式
+        logger.warning(f"任務持久化停用（無法開啟 {TASK_DB_PATH}）: {e}")
+        return None
+
+
+def persist_task(task_id: str):
+    """將任務狀態寫入 SQLite（無持久化時為 no-op）"""
+    if _task_db is None:
+        return
+    task = tasks.get(task_id)
+    if task is None:
+        _task_db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+    else:
+        _task_db.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, data) VALUES (?, ?)",
+            (task_id, orjson.dumps(task).decode('utf-8')),
+        )
+    _task_db.commit()
+
+
+@app.on_event("startup")
+async def _capture_event_loop():
+    """記錄主事件循環，讓背景執行緒可以 thread-safe 地喚醒 SSE 消費者"""
+    global _main_loop, _agent_limiter
+    _main_loop = asyncio.get_running_loop()
+    _agent_limiter = anyio.CapacityLimiter(MAX_AGENTS)
+
+
+async def _sweep_finished_tasks():
+    """背景清理：定期清除已結束超過 MAX_TASK_AGE 的任務，避免內存無限增長"""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL)
+        now = datetime.utcnow()
+        expired = []
+        for task_id, task in list(tasks.items()):
+            if task["status"] not in TERMINAL_STATUSES:
+                continue
+            finished_at = task.get("finished_at")
+            if not finished_at:
+                continue
+            age = (now - datetime.fromisoformat(finished_at)).total_seconds()
+            if age > MAX_TASK_AGE:
+                expired.append(task_id)
+
+        for task_id in expired:
+            # 先通知殘留的 SSE 訂閱者結束串流，再清除記錄
+            publish_task_event(task_id, _TASK_DONE)
+            tasks.pop(task_id, None)
+            task_logs.pop(task_id, None)
+            persist_task(task_id)  # 任務已移除，同步刪除持久化記錄
+            logger.info(f"[{task_id}] 任務已過期，清除記錄")
+
+
+@app.on_event("startup")
+async def _start_task_sweeper():
+    """啟動任務清理背景工作"""
+    asyncio.create_task(_sweep_finished_tasks())
+
+
+def _enqueue_task(task_id: str, user_id: Optional[str]):
+    """將任務放入該使用者的佇列，並喚醒 worker"""
+    user_id = user_id or DEFAULT_USER_GROUP
+    # 停止標誌在入隊時初始化：任務可能排隊等待一段時間，
+    # 期間收到的 stop 請求不可在開始執行時被覆蓋掉
+    stop_flags[task_id] = False
+    queue = user_queues.get(user_id)
+    if queue is None:
+        queue = user_queues[user_id] = deque()
+        _rr_users.append(user_id)
+    queue.append((task_id, time.time()))
+    if _work_available is not None:
+        _work_available.set()
+
+
+def _dequeue_task() -> Optional[str]:
+    """取出下一個任務：round-robin 輪流各使用者，等太久的任務優先"""
+    if not _rr_users:
+        return None
+
+    # Aging：找出全域最老的隊首任務，等待超過閾值就跳過 round-robin
+    oldest_user = None
+    oldest_ts = None
+    for user_id in _rr_users:
+        queue = user_queues[user_id]
+        if queue and (oldest_ts is None or queue[0][1] < oldest_ts):
+            oldest_user, oldest_ts = user_id, queue[0][1]
+
+    if oldest_user is not None and time.time() - oldest_ts > QUEUE_AGING_THRESHOLD:
+        task_id, _ = user_queues[oldest_user].popleft()
+        return task_id
+
+    # Round-robin：輪到的使用者取一個任務，輪過的排到最後
+    for _ in range(len(_rr_users)):
+        user_id = _rr_users[0]
+        _rr_users.rotate(-1)
+        queue = user_queues[user_id]
+        if queue:
+            task_id, _ = queue.popleft()
+            return task_id
+    return None
+
+
+async def _job_worker():
+    """從公平佇列取出任務執行（併發同時受 CapacityLimiter 限制）"""
+    while True:
+        await _work_available.wait()
+        task_id = _dequeue_task()
+        if task_id is None:
+            # 佇列已空；dequeue 與 clear 之間沒有 await，不會遺失喚醒
+            _work_available.clear()
+            continue
+
+        task = tasks.get(task_id)
+        if task is None:
+            continue
+        try:
+            await execute_agent(
+                task_id=task_id,
+                init_prompt=task["init_prompt"],
+                verbose=task.get("verbose", True),
+            )
+        except Exception:
+            # execute_agent 內部已處理任務狀態，這裡只保護 worker 不中斷
+            logger.exception(f"[{task_id}] worker 執行異常")
+
+
+@app.on_event("startup")
+async def _init_task_queue():
+    """初始化任務持久化與工作佇列，還原重啟前的任務狀態"""
+    global _task_db, _work_available
+    _task_db = _init_task_db()
+    _work_available = asyncio.Event()
+
+    # 還原上次容器的任務狀態
+    if _task_db is not None:
+        for task_id, data in _task_db.execute("SELECT task_id, data FROM tasks"):
+            task = orjson.loads(data)
+            tasks[task_id] = task
+            if task["status"] == TaskStatus.PENDING:
+                # 尚未開始的任務重新入隊（at-least-once）
+                _enqueue_task(task_id, task.get("user_id"))
+            elif task["status"] == TaskStatus.RUNNING:
+                # 執行到一半被重啟中斷，標記失敗
+                task["status"] = TaskStatus.FAILED
+                task["error_message"] = "Container restarted during execution"
+                task["finished_at"] = datetime.utcnow().isoformat()
+                persist_task(task_id)
+
+    # 啟動 worker（數量對齊 Agent 併發上限）
+    for _ in range(MAX_AGENTS):
+        asyncio.create_task(_job_worker())
+
+
+def publish_task_event(task_id: str, entry):
+    """將事件發佈給此任務的所有 SSE 訂閱者（可從任何執行緒呼叫）"""
+    try:
+        # Agent 原生非同步執行時，呼叫端就在主循環上
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # 從 worker thread 呼叫時透過主循環排程發佈
+        if _main_loop is not None:
+            _main_loop.call_soon_threadsafe(publish_task_event, task_id, entry)
+        return
+
+    for q in task_subscribers.get(task_id, []):
+        if q.full():
+            # 丟棄最舊事件，發佈端永不阻塞
+            try:
+                q.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        q.put_nowait(entry)
+
 class RunRequest(BaseModel):
     init_prompt: str
     verbose: bool = True
+    user_id: Optional[str] = None  # 公平排程用，未提供時歸入同一組
 
 class CloneRequest(BaseModel):
     repo_url: str
@@ -60,27 +323,112 @@ class TaskStatusResponse(BaseModel):
     error_message: Optional[str] = None
 
 
+@lru_cache(maxsize=1)
+def get_shared_model():
+    """取得 process 共用的 LLM model 實例
+
+    每個任務重建 provider + model 會重複讀取設定並重建 HTTP client，
+    整個 process 共用一個實例即可（ChatAnthropic 實例可安全併發使用）。
+    """
+    return AnthropicModelProvider().get_model()
+
+
 def log_task(task_id: str, message: str):
     """記錄任務日誌（用於 stream）"""
     if task_id not in task_logs:
-        task_logs[task_id] = []
-    timestamp = datetime.utcnow().isoformat()
-    task_logs[task_id].append({"timestamp": timestamp, "message": message})
-    logger.info(f"[{task_id}] {message}")
+        task_logs[task_id] = deque(maxlen=MAX_TASK_LOG_ENTRIES)
+    entry = {
+        # epoch 奈秒整數：呼叫頻率等於 token 速率，不付 datetime+isoformat 配置成本
+        "timestamp": time.time_ns(),
+        "event_type": "log",
+        "message": message,
+    }
+    task_logs[task_id].append(entry)
+    # 每個 chunk 都會經過這裡，預設等級下不付 f-string 格式化成本
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"[{task_id}] {message}")
+    publish_task_event(task_id, entry)
 
 
-def execute_agent(task_id: str, init_prompt: str, verbose: bool):
-    """背景執行 Agent（在 BackgroundTasks 中執行）"""
+def _coerce(obj):
+    """將事件資料一次走訪轉成 JSON 原生型別
+
+    Agent 可能在事件中夾帶 datetime、UUID 或 pydantic model，
+    在建構時轉換一次，序列化就不需要逐值的 default 回呼。
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        return {
+            (k if isinstance(k, str) else str(k)): _coerce(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [_coerce(v) for v in obj]
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return obj.hex
+    if isinstance(obj, BaseModel):
+        return _coerce(obj.model_dump())
+    return str(obj)
+
+
+def log_event(task_id: str, event_type: str, data: dict):
+    """記錄結構化事件（用於 stream，不經過字串序列化）"""
+    if task_id not in task_logs:
+        task_logs[task_id] = deque(maxlen=MAX_TASK_LOG_ENTRIES)
+    entry = {
+        "timestamp": time.time_ns(),
+        "event_type": event_type,
+        "data": _coerce(data),
+    }
+    task_logs[task_id].append(entry)
+    publish_task_event(task_id, entry)
+
+
+def _format_sse_frame(entry: dict) -> bytes:
+    """將日誌 entry 格式化成 SSE frame bytes"""
+    event_type = entry["event_type"]
+    if event_type == "log":
+        payload = orjson.dumps({
+            "timestamp": entry["timestamp"],
+            "message": entry["message"],
+        })
+    else:
+        # 結構化事件（建構時已 _coerce 成 JSON 原生型別，不需 default 回呼）
+        payload = orjson.dumps(entry["data"])
+    return b"event: " + event_type.encode('utf-8') + b"\ndata: " + payload + b"\n\n"
+
+
+def _format_status_frame(task: dict) -> bytes:
+    """將任務最終狀態格式化成 SSE status frame bytes"""
+    payload = orjson.dumps({
+        "status": task["status"].lower(),
+        "finished_at": task.get("finished_at"),
+        "error_message": task.get("error_message"),
+    })
+    return b"event: status\ndata: " + payload + b"\n\n"
+
+
+async def execute_agent(task_id: str, init_prompt: str, verbose: bool):
+    """背景執行 Agent（原生非同步，受 CapacityLimiter 限流）"""
+    async with _agent_limiter:
+        await _execute_agent(task_id, init_prompt, verbose)
+
+
+async def _execute_agent(task_id: str, init_prompt: str, verbose: bool):
+    """執行 Agent 本體（在事件循環上執行，不經過 threadpool）"""
     try:
-        # 初始化日誌和停止標誌
-        task_logs[task_id] = []
-        stop_flags[task_id] = False
+        # 初始化日誌（停止標誌已在入隊時初始化，這裡不可重設）
+        task_logs[task_id] = deque(maxlen=MAX_TASK_LOG_ENTRIES)
 
         # 更新狀態為 RUNNING
         tasks[task_id]["status"] = TaskStatus.RUNNING
         tasks[task_id]["started_at"] = datetime.utcnow().isoformat()
+        persist_task(task_id)
 
-        print(f"🚀 [DEBUG] Task {task_id}: 開始執行", flush=True)
+        logger.info(f"🚀 Task {task_id}: 開始執行")
         log_task(task_id, "🚀 開始執行 Agent")
 
         # 檢查停止標誌
@@ -90,12 +438,11 @@ def execute_agent(task_id: str, init_prompt: str, verbose: bool):
             tasks[task_id]["finished_at"] = datetime.utcnow().isoformat()
             return
 
-        # 初始化 LLM
-        print(f"🔧 [DEBUG] Task {task_id}: 初始化 LLM", flush=True)
+        # 初始化 LLM（process 內共用同一實例）
+        logger.info(f"🔧 Task {task_id}: 初始化 LLM")
         log_task(task_id, "🔧 初始化 LLM...")
-        provider = AnthropicModelProvider()
-        model = provider.get_model()
-        print(f"✅ [DEBUG] Task {task_id}: LLM 初始化完成", flush=True)
+        model = get_shared_model()
+        logger.info(f"✅ Task {task_id}: LLM 初始化完成")
         log_task(task_id, "✅ LLM 初始化完成")
 
         # 再次檢查停止標誌
@@ -106,7 +453,7 @@ def execute_agent(task_id: str, init_prompt: str, verbose: bool):
             return
 
         # 建立並執行 RefactorAgent
-        print(f"🤖 [DEBUG] Task {task_id}: 建立 RefactorAgent", flush=True)
+        logger.info(f"🤖 Task {task_id}: 建立 RefactorAgent")
         log_task(task_id, "🤖 建立 RefactorAgent...")
 
         # 定義停止檢查回調
@@ -119,7 +466,7 @@ def execute_agent(task_id: str, init_prompt: str, verbose: bool):
             verbose=verbose,
             stop_check_callback=should_stop
         )
-        print(f"✅ [DEBUG] Task {task_id}: RefactorAgent 建立完成", flush=True)
+        logger.info(f"✅ Task {task_id}: RefactorAgent 建立完成")
         log_task(task_id, "✅ RefactorAgent 建立完成")
 
         # 定義事件回調函數，將 chunk 事件轉發到日誌
@@ -132,19 +479,14 @@ def execute_agent(task_id: str, init_prompt: str, verbose: bool):
                 # 拋出異常來中斷執行
                 raise KeyboardInterrupt("Task stopped by user")
 
-            import json
-            # 將事件序列化為 JSON 並記錄
-            event_log = {
-                "event_type": event_type,
-                "data": data
-            }
-            log_task(task_id, f"[{event_type}] {json.dumps(data, ensure_ascii=False, default=str)}")
+            # 直接儲存結構化事件，序列化延後到 SSE 發送時
+            log_event(task_id, event_type, data)
 
-        print(f"▶️  [DEBUG] Task {task_id}: 開始執行 Agent", flush=True)
+        logger.info(f"▶️  Task {task_id}: 開始執行 Agent")
         log_task(task_id, f"▶️  執行 Agent，init_prompt: {init_prompt[:100]}...")
 
-        # 執行 Agent（可能會被 KeyboardInterrupt 中斷）
-        agent.run(user_message=init_prompt, event_callback=handle_chunk_event)
+        # 非同步執行 Agent（可能會被 KeyboardInterrupt 中斷）
+        await agent.arun(user_message=init_prompt, event_callback=handle_chunk_event)
 
         # 檢查是否被停止
         if stop_flags.get(task_id, False):
@@ -155,62 +497,63 @@ def execute_agent(task_id: str, init_prompt: str, verbose: bool):
             # 標記完成
             tasks[task_id]["status"] = TaskStatus.SUCCESS
             tasks[task_id]["finished_at"] = datetime.utcnow().isoformat()
-            print(f"✅ [DEBUG] Task {task_id}: Agent 執行完成", flush=True)
+            logger.info(f"✅ Task {task_id}: Agent 執行完成")
             log_task(task_id, "✅ Agent 執行完成")
 
     except KeyboardInterrupt:
         # 用戶停止任務
-        print(f"⏹️  [DEBUG] Task {task_id}: 任務被用戶中斷", flush=True)
+        logger.info(f"⏹️  Task {task_id}: 任務被用戶中斷")
         log_task(task_id, "⏹️  任務已被用戶停止")
         tasks[task_id]["status"] = TaskStatus.STOPPED
         tasks[task_id]["error_message"] = "Task stopped by user"
         tasks[task_id]["finished_at"] = datetime.utcnow().isoformat()
     except Exception as e:
         error_msg = f"Agent execution failed: {str(e)}"
-        print(f"❌ [DEBUG] Task {task_id}: 錯誤 - {error_msg}", flush=True)
-        print(f"[DEBUG] Traceback:\n{traceback.format_exc()}", flush=True)
+        # traceback 只格式化一次，存在任務記錄供查詢，不塞進 SSE 串流
+        tb = traceback.format_exc()
         log_task(task_id, f"❌ 錯誤: {error_msg}")
-        log_task(task_id, f"Traceback: {traceback.format_exc()}")
-        logger.error(f"[{task_id}] {error_msg}\n{traceback.format_exc()}")
+        logger.error(f"[{task_id}] {error_msg}\n{tb}")
         tasks[task_id]["status"] = TaskStatus.FAILED
         tasks[task_id]["error_message"] = error_msg
+        tasks[task_id]["traceback"] = tb
         tasks[task_id]["finished_at"] = datetime.utcnow().isoformat()
     finally:
         # 清理停止標誌
         if task_id in stop_flags:
             del stop_flags[task_id]
+        # 持久化最終狀態，並通知所有 SSE 訂閱者結束串流
+        persist_task(task_id)
+        publish_task_event(task_id, _TASK_DONE)
 
 
 @app.post("/run", response_model=RunResponse)
-async def run_agent(request: RunRequest, background_tasks: BackgroundTasks):
+async def run_agent(request: RunRequest):
     """啟動 Agent 執行（異步模式）
 
     立即返回 task_id，Agent 在背景執行。
     使用 GET /tasks/{task_id} 查詢執行狀態。
     """
-    # 生成唯一 task_id
-    task_id = str(uuid.uuid4())
+    # 生成唯一 task_id（hex 格式，省去插入破折號的步驟）
+    task_id = uuid.uuid4().hex
 
     # 建立任務記錄
     tasks[task_id] = {
         "task_id": task_id,
         "status": TaskStatus.PENDING,
         "init_prompt": request.init_prompt,
+        "verbose": request.verbose,
+        "user_id": request.user_id,
         "created_at": datetime.utcnow().isoformat(),
         "started_at": None,
         "finished_at": None,
         "error_message": None,
     }
+    persist_task(task_id)
 
-    # 啟動背景任務
-    background_tasks.add_task(
-        execute_agent,
-        task_id=task_id,
-        init_prompt=request.init_prompt,
-        verbose=request.verbose
-    )
+    # 入隊，由背景 worker 公平排程執行（重啟後 PENDING 任務會重新入隊）
+    _enqueue_task(task_id, request.user_id)
 
-    logger.info(f"[{task_id}] 任務已建立，開始背景執行")
+    logger.info(f"[{task_id}] 任務已建立，等待 worker 執行")
 
     return RunResponse(
         task_id=task_id,
@@ -242,92 +585,125 @@ async def health():
     return {"status": "healthy"}
 
 
-@app.get("/tasks")
-async def list_tasks():
-    """列出所有任務（調試用）"""
-    return {"total": len(tasks), "tasks": list(tasks.values())}
+@app.get("/tasks", response_class=ORJSONResponse)
+async def list_tasks(limit: int = 100, cursor: Optional[str] = None):
+    """列出任務（分頁，調試用）
+
+    cursor 為上一頁最後一筆的 task_id，回應帶 next_cursor 供翻頁；
+    避免一次序列化全部任務阻塞事件循環。
+    """
+    limit = max(1, min(limit, 1000))
+
+    # tasks 依建立順序插入，直接以 key 順序分頁
+    task_ids = list(tasks.keys())
+    start = 0
+    if cursor is not None:
+        try:
+            start = task_ids.index(cursor) + 1
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    page_ids = task_ids[start:start + limit]
+    next_cursor = page_ids[-1] if start + limit < len(task_ids) else None
+
+    return {
+        "total": len(tasks),
+        "tasks": [tasks[task_id] for task_id in page_ids],
+        "next_cursor": next_cursor,
+    }
 
 
 @app.get("/tasks/{task_id}/stream")
 async def stream_task_logs(task_id: str):
     """SSE 串流任務執行日誌（支援結構化事件）"""
-    from sse_starlette.sse import EventSourceResponse
-    import asyncio
-    import json as json_lib
-
     if task_id not in tasks:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    async def event_generator():
-        """生成 SSE events"""
-        last_index = 0
-
-        while True:
-            # 檢查任務狀態
+    async def byte_generator():
+        """直接生成 SSE bytes（fan-out pub/sub，不輪詢、不做 last_index 切片）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscribers = task_subscribers.setdefault(task_id, [])
+        subscribers.append(queue)
+        # 訂閱後立即快照歷史日誌：之後的新事件只會進 queue，不重複也不遺漏
+        # （訂閱與快照之間沒有 await，事件循環不會插入其他 coroutine）
+        history = list(task_logs.get(task_id, []))
+
+        try:
+            # 補發歷史日誌
+            for log in history:
+                yield _format_sse_frame(log)
+
+            # 任務已結束則補發 status 後直接結束
             task = tasks.get(task_id)
-            if not task:
-                break
-
-            # 發送新日誌
-            if task_id in task_logs:
-                current_logs = task_logs[task_id]
-                new_logs = current_logs[last_index:]
-
-                for log in new_logs:
-                    message = log['message']
-
-                    # 嘗試解析是否為結構化事件（[event_type] JSON）
-                    if message.startswith('[') and ']' in message:
-                        try:
-                            # 提取 event_type 和 JSON 數據
-                            close_bracket = message.index(']')
-                            event_type = message[1:close_bracket]
-                            json_data = message[close_bracket + 2:]  # 跳過 '] '
-
-                            # 嘗試解析 JSON
-                            data = json_lib.loads(json_data)
-
-                            # 發送結構化事件
-                            yield {
-                                "event": event_type,
-                                "data": json_lib.dumps(data, ensure_ascii=False)
-                            }
-                        except (ValueError, json_lib.JSONDecodeError):
-                            # 解析失敗，作為普通日誌發送
-                            yield {
-                                "event": "log",
-                                "data": json_lib.dumps({
-                                    "timestamp": log['timestamp'],
-                                    "message": message
-                                }, ensure_ascii=False)
-                            }
-                    else:
-                        # 普通日誌訊息
-                        yield {
-                            "event": "log",
-                            "data": json_lib.dumps({
-                                "timestamp": log['timestamp'],
-                                "message": message
-                            }, ensure_ascii=False)
-                        }
-
-                last_index = len(current_logs)
-
-            # 如果任務完成，發送完成事件並結束
-            if task["status"] in [TaskStatus.SUCCESS, TaskStatus.FAILED, TaskStatus.STOPPED]:
-                yield {
-                    "event": "status",
-                    "data": json_lib.dumps({
-                        "status": task['status'].lower(),
-                        "finished_at": task.get('finished_at'),
-                        "error_message": task.get('error_message')
-                    }, ensure_ascii=False)
-                }
-                break
-
-            await asyncio.sleep(0.5)  # 每 0.5 秒檢查一次（更即時）
-
-    return EventSourceResponse(event_generator())
+            if task is None:
+                return
+            if task["status"] in TERMINAL_STATUSES:
+                # 補發歷史日誌時 yield 會讓出控制權，期間發佈的事件
+                # 已進入 queue——先清空再收尾，避免尾端事件遺失
+                while True:
+                    try:
+                        entry = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if entry is _TASK_DONE:
+                        break
+                    yield _format_sse_frame(entry)
+                yield _format_status_frame(task)
+                return
+
+            # 即時轉發新事件；連續的 ai_content 在小窗口內合併
+            while True:
+                entry = await queue.get()
+                if entry is _TASK_DONE:
+                    task = tasks.get(task_id)
+                    if task is not None:
+                        yield _format_status_frame(task)
+                    return
+                if entry["event_type"] != "ai_content":
+                    yield _format_sse_frame(entry)
+                    continue
+
+                # 合併窗口內的後續 ai_content；遇到其他事件或超時即 flush
+                contents = [entry["data"].get("content", "")]
+                pending = None
+                while True:
+                    try:
+                        nxt = await asyncio.wait_for(
+                            queue.get(), timeout=AI_CONTENT_COALESCE_WINDOW
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                    if nxt is _TASK_DONE or nxt["event_type"] != "ai_content":
+                        pending = nxt
+                        break
+                    contents.append(nxt["data"].get("content", ""))
+
+                payload = orjson.dumps({"content": "".join(contents)})
+                yield b"event: ai_content\ndata: " + payload + b"\n\n"
+
+                if pending is _TASK_DONE:
+                    task = tasks.get(task_id)
+                    if task is not None:
+                        yield _format_status_frame(task)
+                    return
+                if pending is not None:
+                    yield _format_sse_frame(pending)
+        finally:
+            # 消費者斷線或結束，移除訂閱
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                task_subscribers.pop(task_id, None)
+
+    return StreamingResponse(
+        byte_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Connection": "keep-alive",
+        }
+    )
 
 
 @app.post("/tasks/{task_id}/stop")
@@ -362,7 +738,7 @@ async def stop_task(task_id: str):
 
 
 @app.post("/tasks/{task_id}/resume")
-async def resume_task(task_id: str, background_tasks: BackgroundTasks):
+async def resume_task(task_id: str):
     """繼續執行已停止的任務
 
     實際上會使用原始的 init_prompt 重新啟動一個新的任務。
@@ -380,27 +756,25 @@ async def resume_task(task_id: str, background_tasks: BackgroundTasks):
         )
 
     # 使用原始 init_prompt 建立新任務
-    new_task_id = str(uuid.uuid4())
+    new_task_id = uuid.uuid4().hex
     init_prompt = old_task["init_prompt"]
 
     tasks[new_task_id] = {
         "task_id": new_task_id,
         "status": TaskStatus.PENDING,
         "init_prompt": init_prompt,
+        "verbose": True,
+        "user_id": old_task.get("user_id"),
         "created_at": datetime.utcnow().isoformat(),
         "started_at": None,
         "finished_at": None,
         "error_message": None,
         "resumed_from": task_id  # 記錄從哪個任務恢復
     }
+    persist_task(new_task_id)
 
-    # 啟動背景任務
-    background_tasks.add_task(
-        execute_agent,
-        task_id=new_task_id,
-        init_prompt=init_prompt,
-        verbose=True
-    )
+    # 入隊，由背景 worker 公平排程執行
+    _enqueue_task(new_task_id, old_task.get("user_id"))
 
     logger.info(f"[{new_task_id}] Task resumed from [{task_id}]")
     log_task(new_task_id, f"▶️  從任務 {task_id} 恢復執行")
@@ -16,20 +16,29 @@ class ChunkParser:
     - 格式化輸出讓中間過程清晰可見
     """
 
-    def __init__(self, verbose: bool = True, event_callback=None):
+    def __init__(self, verbose: bool = True, event_callback=None, console: bool = True):
         """初始化 ChunkParser
 
         Args:
             verbose: 是否顯示詳細資訊 (包含 metadata, tool calls 等)
             event_callback: 可選的回調函數，用於處理每個解析事件
                           函數簽名: callback(event_type: str, data: dict)
+            console: 是否輸出到終端機。伺服器路徑應設為 False，
+                    避免逐 token 的同步 print 阻塞事件循環
+                    （事件仍照常透過 event_callback 發送）
         """
         self.verbose = verbose
         self.event_callback = event_callback
+        self.console = console
         self.chunk_count = 0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
 
+    def _print(self, *args, **kwargs) -> None:
+        """console 模式下才輸出到終端機"""
+        if self.console:
+            print(*args, **kwargs)
+
     def parse(self, chunk: dict) -> None:
         """解析並顯示單一 chunk
 
@@ -49,10 +58,10 @@ class ChunkParser:
         else:
             # 其他類型的 chunk (e.g., metadata, status)
             if self.verbose:
-                print(f"\n{'='*60}")
-                print(f"[Chunk #{self.chunk_count}] 未知類型")
-                print(f"{'='*60}")
-                print(json.dumps(chunk, indent=2, ensure_ascii=False, default=str))
+                self._print(f"\n{'='*60}")
+                self._print(f"[Chunk #{self.chunk_count}] 未知類型")
+                self._print(f"{'='*60}")
+                self._print(json.dumps(chunk, indent=2, ensure_ascii=False, default=str))
 
     def _parse_model_chunk(self, model_chunk: dict) -> None:
         """解析 model chunk (包含 AI 訊息)"""
@@ -77,7 +86,7 @@ class ChunkParser:
             if isinstance(content, str):
                 content_text = content
                 # 文字內容 - 直接串流輸出
-                print(content, end="", flush=True)
+                self._print(content, end="", flush=True)
             elif isinstance(content, list):
                 # 多模態內容 (text, image, etc.)
                 for block in content:
@@ -85,11 +94,11 @@ class ChunkParser:
                         if block.get('type') == 'text':
                             text = block.get('text', '')
                             content_text += text
-                            print(text, end="", flush=True)
+                            self._print(text, end="", flush=True)
                     else:
                         text = str(block)
                         content_text += text
-                        print(text, end="", flush=True)
+                        self._print(text, end="", flush=True)
 
             # 發送 content 事件
             if content_text and self.event_callback:
@@ -97,14 +106,14 @@ class ChunkParser:
 
         # 2. Tool Calls (工具調用)
         if hasattr(msg, 'tool_calls') and msg.tool_calls and self.verbose:
-            print(f"\n\n{'─'*60}")
-            print(f"🔧 [Tool Calls] 偵測到工具調用:")
+            self._print(f"\n\n{'─'*60}")
+            self._print(f"🔧 [Tool Calls] 偵測到工具調用:")
 
             tool_calls_data = []
             for i, tool_call in enumerate(msg.tool_calls, 1):
-                print(f"\n  #{i} {tool_call.get('name', 'unknown')}")
-                print(f"      ID: {tool_call.get('id', 'N/A')}")
-                print(f"      Args: {json.dumps(tool_call.get('args', {}), indent=8, ensure_ascii=False)}")
+                self._print(f"\n  #{i} {tool_call.get('name', 'unknown')}")
+                self._print(f"      ID: {tool_call.get('id', 'N/A')}")
+                self._print(f"      Args: {json.dumps(tool_call.get('args', {}), indent=8, ensure_ascii=False)}")
 
                 tool_calls_data.append({
                     "name": tool_call.get('name', 'unknown'),
@@ -112,7 +121,7 @@ class ChunkParser:
                     "args": tool_call.get('args', {})
                 })
 
-            print(f"{'─'*60}\n")
+            self._print(f"{'─'*60}\n")
 
             # 發送 tool_calls 事件
             if self.event_callback:
@@ -129,11 +138,11 @@ class ChunkParser:
                 self.total_input_tokens += input_tokens
                 self.total_output_tokens += output_tokens
 
-                print(f"\n\n{'─'*60}")
-                print(f"📊 [Token Usage]")
-                print(f"  Input:  {input_tokens:,} tokens")
-                print(f"  Output: {output_tokens:,} tokens")
-                print(f"  Total:  {total_tokens:,} tokens")
+                self._print(f"\n\n{'─'*60}")
+                self._print(f"📊 [Token Usage]")
+                self._print(f"  Input:  {input_tokens:,} tokens")
+                self._print(f"  Output: {output_tokens:,} tokens")
+                self._print(f"  Total:  {total_tokens:,} tokens")
 
                 usage_data = {
                     "input_tokens": input_tokens,
@@ -144,17 +153,17 @@ class ChunkParser:
                 # 顯示額外細節 (如果有)
                 if 'input_token_details' in usage:
                     details = usage['input_token_details']
-                    print(f"  Input Details: cache_read={details.get('cache_read', 0)}, audio={details.get('audio', 0)}")
+                    self._print(f"  Input Details: cache_read={details.get('cache_read', 0)}, audio={details.get('audio', 0)}")
                     usage_data['input_token_details'] = details
 
                 if 'output_token_details' in usage:
                     details = usage['output_token_details']
                     reasoning = details.get('reasoning', 0)
                     if reasoning > 0:
-                        print(f"  Reasoning Tokens: {reasoning:,}")
+                        self._print(f"  Reasoning Tokens: {reasoning:,}")
                     usage_data['output_token_details'] = details
 
-                print(f"{'─'*60}\n")
+                self._print(f"{'─'*60}\n")
 
                 # 發送 token_usage 事件
                 if self.event_callback:
@@ -164,10 +173,10 @@ class ChunkParser:
         if hasattr(msg, 'response_metadata') and msg.response_metadata and self.verbose:
             metadata = msg.response_metadata
             if isinstance(metadata, dict) and metadata:
-                print(f"\n{'─'*60}")
-                print(f"ℹ️  [Response Metadata]")
-                print(json.dumps(metadata, indent=2, ensure_ascii=False, default=str))
-                print(f"{'─'*60}\n")
+                self._print(f"\n{'─'*60}")
+                self._print(f"ℹ️  [Response Metadata]")
+                self._print(json.dumps(metadata, indent=2, ensure_ascii=False, default=str))
+                self._print(f"{'─'*60}\n")
 
                 # 發送 response_metadata 事件
                 if self.event_callback:
@@ -177,18 +186,18 @@ class ChunkParser:
         """顯示字典格式的訊息"""
         content = msg_dict.get('content', '')
         if content:
-            print(content, end="", flush=True)
+            self._print(content, end="", flush=True)
 
         if self.verbose and msg_dict.get('tool_calls'):
-            print(f"\n\n🔧 [Tool Calls]: {len(msg_dict['tool_calls'])} calls")
+            self._print(f"\n\n🔧 [Tool Calls]: {len(msg_dict['tool_calls'])} calls")
 
     def _parse_tools_chunk(self, tools_chunk: dict) -> None:
         """解析 tools chunk (工具執行結果)"""
         messages = tools_chunk.get('messages', [])
 
-        print(f"\n\n{'='*60}")
-        print(f"🛠️  [Tools Execution] {len(messages)} result(s)")
-        print(f"{'='*60}")
+        self._print(f"\n\n{'='*60}")
+        self._print(f"🛠️  [Tools Execution] {len(messages)} result(s)")
+        self._print(f"{'='*60}")
 
         tools_results = []
 
@@ -222,19 +231,19 @@ class ChunkParser:
                     tool_call_id = tool_call_id_match.group(1)
             
             # 顯示結果
-            print(f"\n  #{i} 📄 {name or 'unknown'}")
+            self._print(f"\n  #{i} 📄 {name or 'unknown'}")
             if tool_call_id:
-                print(f"     ID: {tool_call_id[:20]}...")
-            print(f"     {'─'*50}")
+                self._print(f"     ID: {tool_call_id[:20]}...")
+            self._print(f"     {'─'*50}")
             if content:
                 # 顯示內容（限制長度）
                 content_preview = content[:500] if len(content) > 500 else content
                 # 縮排每一行
                 for line in content_preview.split('\n'):
-                    print(f"     {line}")
+                    self._print(f"     {line}")
                 if len(content) > 500:
-                    print(f"     ... (共 {len(content)} 字元)")
-            print(f"     {'─'*50}")
+                    self._print(f"     ... (共 {len(content)} 字元)")
+            self._print(f"     {'─'*50}")
 
             # 收集工具結果
             tools_results.append({
@@ -244,7 +253,7 @@ class ChunkParser:
                 "content_length": len(content) if content else 0
             })
 
-        print(f"{'='*60}\n")
+        self._print(f"{'='*60}\n")
 
         # 發送 tools_execution 事件
         if self.event_callback:
@@ -289,14 +298,14 @@ class ChunkParser:
                 # 繼續顯示 verbose 輸出
 
             if self.verbose:
-                print(f"\n{'─'*60}")
-                print(f"⚙️  [{middleware_name}] {event_type}")
-                print(f"{'─'*60}")
+                self._print(f"\n{'─'*60}")
+                self._print(f"⚙️  [{middleware_name}] {event_type}")
+                self._print(f"{'─'*60}")
                 if isinstance(value, dict):
-                    print(json.dumps(value, indent=2, ensure_ascii=False, default=str))
+                    self._print(json.dumps(value, indent=2, ensure_ascii=False, default=str))
                 else:
-                    print(str(value))
-                print(f"{'─'*60}\n")
+                    self._print(str(value))
+                self._print(f"{'─'*60}\n")
 
     def _handle_todo_update(self, value: any) -> None:
         """處理 TodoList 更新事件
@@ -331,11 +340,11 @@ class ChunkParser:
     def print_summary(self) -> None:
         """顯示總結資訊"""
         if self.verbose:
-            print(f"\n\n{'='*60}")
-            print(f"📈 [Session Summary]")
-            print(f"{'='*60}")
-            print(f"  Total Chunks: {self.chunk_count}")
-            print(f"  Total Input Tokens: {self.total_input_tokens:,}")
-            print(f"  Total Output Tokens: {self.total_output_tokens:,}")
-            print(f"  Grand Total: {self.total_input_tokens + self.total_output_tokens:,} tokens")
-            print(f"{'='*60}\n")
+            self._print(f"\n\n{'='*60}")
+            self._print(f"📈 [Session Summary]")
+            self._print(f"{'='*60}")
+            self._print(f"  Total Chunks: {self.chunk_count}")
+            self._print(f"  Total Input Tokens: {self.total_input_tokens:,}")
+            self._print(f"  Total Output Tokens: {self.total_output_tokens:,}")
+            self._print(f"  Grand Total: {self.total_input_tokens + self.total_output_tokens:,} tokens")
+            self._print(f"{'='*60}\n")
@@ -100,6 +100,47 @@ class RefactorAgent:
         # 顯示總結
         parser.print_summary()
 
+    async def arun(self, user_message: str = "檢視我的專案資料夾結構", event_callback=None):
+        """非同步執行 Agent 並使用 ChunkParser 解析串流輸出
+
+        與 run() 行為相同，但使用 astream 原生非同步串流，
+        讓 server 端不需要佔用 worker thread。
+
+        Args:
+            user_message: 使用者訊息
+            event_callback: 可選的回調函數，用於處理每個解析事件
+                          函數簽名: callback(event_type: str, data: dict)
+        """
+        # 初始化 ChunkParser（傳入 callback）
+        # console=False：伺服器路徑在事件循環上執行，逐 token 的同步 print
+        # 會阻塞事件循環；console 輸出關閉後事件仍透過 event_callback 發送
+        parser = ChunkParser(
+            verbose=self.verbose, event_callback=event_callback, console=False
+        )
+
+        # 非同步串流執行
+        result = self.agent.astream({
+            "messages": [
+                {"role": "user", "content": user_message}
+            ]
+        })
+
+        # 使用 ChunkParser 解析每個 chunk
+        try:
+            async for chunk in result:
+                # 檢查是否應該停止
+                if self.stop_check_callback and self.stop_check_callback():
+                    logger.info("⏹️  檢測到停止信號，中斷 Agent 執行")
+                    raise KeyboardInterrupt("Agent stopped by user")
+
+                parser.parse(chunk)
+        except KeyboardInterrupt:
+            logger.info("⏹️  Agent 執行已被中斷")
+            raise
+
+        # 顯示總結
+        parser.print_summary()
+
 
 if __name__ == "__main__":
     # 初始化 LLM (根據環境變數 LLM_PROVIDER 自動選擇)
@@ -56,7 +56,8 @@ async def run_agent(
                 f"http://{container_name}:8000/run",
                 json={
                     "init_prompt": project.init_prompt,
-                    "verbose": True
+                    "verbose": True,
+                    "user_id": current_user.id  # 容器內公平排程用
                 }
             )
             run_response.raise_for_status()
@@ -22,6 +22,15 @@ class RefactorCLI:
         self.api_base_url = api_base_url
         self.token: Optional[str] = None
         self.current_project_id: Optional[str] = None
+        # 共用連線池：所有 API 呼叫走同一個 client，避免每次重建 TCP/TLS 連線
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10),
+            timeout=httpx.Timeout(30.0),
+        )
+
+    async def aclose(self):
+        """關閉共用的 HTTP client"""
+        await self.client.aclose()
 
     def print_header(self, text: str):
         """印出標題"""
@@ -73,27 +82,26 @@ class RefactorCLI:
             if not username:
                 username = email.split("@")[0]
 
-            async with httpx.AsyncClient() as client:
-                # 註冊
-                response = await client.post(
-                    f"{self.api_base_url}/api/v1/auth/register",
-                    json={
-                        "email": email,
-                        "username": username,
-                        "password": password
-                    }
-                )
-
-                if response.status_code == 201:  # 註冊成功
-                    data = response.json()
-                    self.print_success(f"註冊成功！使用者: {email} ({data.get('username', username)})")
-
-                    # 註冊成功後自動登入取得 token
-                    self.print_info("正在自動登入...")
-                    return await self.login(email, password)
-                else:
-                    self.print_error(f"註冊失敗: {response.text}")
-                    return False
+            # 註冊
+            response = await self.client.post(
+                f"{self.api_base_url}/api/v1/auth/register",
+                json={
+                    "email": email,
+                    "username": username,
+                    "password": password
+                }
+            )
+
+            if response.status_code == 201:  # 註冊成功
+                data = response.json()
+                self.print_success(f"註冊成功！使用者: {email} ({data.get('username', username)})")
+
+                # 註冊成功後自動登入取得 token
+                self.print_info("正在自動登入...")
+                return await self.login(email, password)
+            else:
+                self.print_error(f"註冊失敗: {response.text}")
+                return False
         except Exception as e:
             self.print_error(f"註冊錯誤: {e}")
             return False
@@ -101,20 +109,19 @@ class RefactorCLI:
     async def login(self, email: str, password: str) -> bool:
         """登入"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/api/v1/auth/login",
-                    json={"email": email, "password": password}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    self.token = data["access_token"]
-                    self.print_success(f"登入成功！使用者: {email}")
-                    return True
-                else:
-                    self.print_error(f"登入失敗: {response.text}")
-                    return False
+            response = await self.client.post(
+                f"{self.api_base_url}/api/v1/auth/login",
+                json={"email": email, "password": password}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                self.token = data["access_token"]
+                self.print_success(f"登入成功！使用者: {email}")
+                return True
+            else:
+                self.print_error(f"登入失敗: {response.text}")
+                return False
         except Exception as e:
             self.print_error(f"登入錯誤: {e}")
             return False
@@ -132,29 +139,28 @@ class RefactorCLI:
             return None
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_base_url}/api/v1/projects",
-                    json={
-                        "repo_url": repo_url,
-                        "branch": branch,
-                        "init_prompt": init_prompt
-                    },
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-
-                if response.status_code == 201:
-                    data = response.json()
-                    project_id = data["id"]
-                    self.current_project_id = project_id
-                    self.print_success(f"專案建立成功！ID: {project_id}")
-                    self.print_info(f"名稱: {name}")
-                    self.print_info(f"Repository: {repo_url}")
-                    self.print_info(f"Branch: {branch}")
-                    return project_id
-                else:
-                    self.print_error(f"建立專案失敗: {response.text}")
-                    return None
+            response = await self.client.post(
+                f"{self.api_base_url}/api/v1/projects",
+                json={
+                    "repo_url": repo_url,
+                    "branch": branch,
+                    "init_prompt": init_prompt
+                },
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+
+            if response.status_code == 201:
+                data = response.json()
+                project_id = data["id"]
+                self.current_project_id = project_id
+                self.print_success(f"專案建立成功！ID: {project_id}")
+                self.print_info(f"名稱: {name}")
+                self.print_info(f"Repository: {repo_url}")
+                self.print_info(f"Branch: {branch}")
+                return project_id
+            else:
+                self.print_error(f"建立專案失敗: {response.text}")
+                return None
         except Exception as e:
             self.print_error(f"建立專案錯誤: {e}")
             return None
@@ -166,35 +172,34 @@ class RefactorCLI:
             return []
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.api_base_url}/api/v1/projects",
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    # API 返回的是 "projects" 不是 "items"
-                    projects = data.get("projects", data.get("items", []))
-
-                    if not projects:
-                        self.print_info("目前沒有專案")
-                        return []
-
-                    self.print_header(f"專案列表 (共 {data.get('total', len(projects))} 個)")
-                    for i, proj in enumerate(projects, 1):
-                        repo_url = proj.get('repo_url', 'Unknown')
-                        repo_name = self.extract_repo_name(repo_url)
-
-                        print(f"{i}. [{proj['id'][:8]}] {repo_name}")
-                        print(f"   狀態: {proj['status']}")
-                        print(f"   Repository: {repo_url}")
-                        print()
-
-                    return projects
-                else:
-                    self.print_error(f"列出專案失敗: {response.text}")
+            response = await self.client.get(
+                f"{self.api_base_url}/api/v1/projects",
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                # API 返回的是 "projects" 不是 "items"
+                projects = data.get("projects", data.get("items", []))
+
+                if not projects:
+                    self.print_info("目前沒有專案")
                     return []
+
+                self.print_header(f"專案列表 (共 {data.get('total', len(projects))} 個)")
+                for i, proj in enumerate(projects, 1):
+                    repo_url = proj.get('repo_url', 'Unknown')
+                    repo_name = self.extract_repo_name(repo_url)
+
+                    print(f"{i}. [{proj['id'][:8]}] {repo_name}")
+                    print(f"   狀態: {proj['status']}")
+                    print(f"   Repository: {repo_url}")
+                    print()
+
+                return projects
+            else:
+                self.print_error(f"列出專案失敗: {response.text}")
+                return []
         except Exception as e:
             self.print_error(f"列出專案錯誤: {e}")
             return []
@@ -210,22 +215,22 @@ class RefactorCLI:
             if dev_mode is not None:
                 params["dev_mode"] = dev_mode
 
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                response = await client.post(
-                    f"{self.api_base_url}/api/v1/projects/{project_id}/provision",
-                    params=params,
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    self.print_success(f"Provision 成功！")
-                    self.print_info(f"Container ID: {data.get('container_id', 'N/A')}")
-                    self.print_info(f"狀態: {data.get('status', 'N/A')}")
-                    return True
-                else:
-                    self.print_error(f"Provision 失敗: {response.text}")
-                    return False
+            response = await self.client.post(
+                f"{self.api_base_url}/api/v1/projects/{project_id}/provision",
+                params=params,
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=300.0  # provision 需要 clone repo，放寬 timeout
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                self.print_success(f"Provision 成功！")
+                self.print_info(f"Container ID: {data.get('container_id', 'N/A')}")
+                self.print_info(f"狀態: {data.get('status', 'N/A')}")
+                return True
+            else:
+                self.print_error(f"Provision 失敗: {response.text}")
+                return False
         except Exception as e:
             self.print_error(f"Provision 錯誤: {e}")
             return False
@@ -237,27 +242,55 @@ class RefactorCLI:
             return None
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.api_base_url}/api/v1/projects/{project_id}/agent/run",
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    # API 返回的是 "run_id" 不是 "task_id"
-                    run_id = data.get("run_id", data.get("task_id"))
-                    self.print_success(f"Agent 已啟動！")
-                    self.print_info(f"Run ID: {run_id}")
-                    self.print_info(f"狀態: {data.get('status', 'RUNNING')}")
-                    return run_id
-                else:
-                    self.print_error(f"啟動 Agent 失敗: {response.text}")
-                    return None
+            response = await self.client.post(
+                f"{self.api_base_url}/api/v1/projects/{project_id}/agent/run",
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                # API 返回的是 "run_id" 不是 "task_id"
+                run_id = data.get("run_id", data.get("task_id"))
+                self.print_success(f"Agent 已啟動！")
+                self.print_info(f"Run ID: {run_id}")
+                self.print_info(f"狀態: {data.get('status', 'RUNNING')}")
+                return run_id
+            else:
+                self.print_error(f"啟動 Agent 失敗: {response.text}")
+                return None
         except Exception as e:
             self.print_error(f"啟動 Agent 錯誤: {e}")
             return None
 
+    def _print_sse_frame(self, frame: bytes):
+        """解析並顯示單一 SSE frame（event:/data: 行都在 bytes 上比對）"""
+        event_type = None
+        data = None
+        for line in frame.split(b"\n"):
+            if line.startswith(b"data: "):
+                data = line[6:]  # 移除 "data: " 前綴
+            elif line.startswith(b"event: "):
+                event_type = line[7:].decode('utf-8', 'replace')
+
+        if event_type and event_type != "ping":
+            print(f"[事件] {event_type}")
+
+        if data is not None:
+            try:
+                # json.loads 可直接吃 bytes，不需先 decode
+                json_data = json.loads(data)
+                timestamp = json_data.get("timestamp", "")
+                if isinstance(timestamp, int):
+                    # 伺服器端送的是 epoch 奈秒整數，顯示前轉成可讀時間
+                    timestamp = datetime.fromtimestamp(timestamp / 1e9).isoformat(
+                        timespec='seconds'
+                    )
+                message = json_data.get("message", json_data)
+                print(f"[{timestamp}] {message}")
+            except (json.JSONDecodeError, AttributeError):
+                # 不是 JSON（或不是 dict），直接顯示
+                print(data.decode('utf-8', 'replace'))
+
     async def stream_logs(self, project_id: str, run_id: str):
         """串流 Agent 執行日誌"""
         if not self.token:
@@ -269,30 +302,21 @@ class RefactorCLI:
             self.print_header(f"開始串流日誌 (Run ID: {run_id[:8]}...)")
             self.print_info("按 Ctrl+C 停止串流\n")
 
-            async with httpx.AsyncClient(timeout=None) as client:
-                async with client.stream(
-                    "GET",
-                    f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}/stream",
-                    headers={"Authorization": f"Bearer {self.token}"}
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line.strip():
-                            # 解析 SSE 格式
-                            if line.startswith("data: "):
-                                data = line[6:]  # 移除 "data: " 前綴
-                                try:
-                                    # 嘗試解析 JSON
-                                    json_data = json.loads(data)
-                                    timestamp = json_data.get("timestamp", "")
-                                    message = json_data.get("message", data)
-                                    print(f"[{timestamp}] {message}")
-                                except json.JSONDecodeError:
-                                    # 不是 JSON，直接顯示
-                                    print(data)
-                            elif line.startswith("event: "):
-                                event_type = line[7:]
-                                if event_type != "ping":
-                                    print(f"[事件] {event_type}")
+            async with self.client.stream(
+                "GET",
+                f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}/stream",
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=httpx.Timeout(30.0, read=None)  # SSE 串流不限制 read timeout
+            ) as response:
+                # 以 bytes 層級切割 SSE frame（空行分隔），
+                # 不經過 aiter_lines 的逐行解碼，高速 token 串流時省一半配置
+                buf = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buf += chunk
+                    while (i := buf.find(b"\n\n")) != -1:
+                        frame = bytes(buf[:i])
+                        del buf[:i + 2]
+                        self._print_sse_frame(frame)
 
             stream_completed = True
             self.print_success("\n日誌串流結束")
@@ -316,40 +340,40 @@ class RefactorCLI:
     async def _check_final_status(self, project_id: str, run_id: str):
         """檢查 Agent 執行的最終狀態"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}",
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    status = data.get("status", "unknown")
-
-                    # 根據狀態顯示不同訊息
-                    if status == "SUCCESS":
-                        self.print_success(f"✅ Agent 執行成功！")
-
-                        # 提示可用的 artifacts
-                        artifacts_path = data.get("artifacts_path")
-                        if artifacts_path:
-                            self.print_info(f"📁 Artifacts 路徑: {artifacts_path}")
-                            self.print_info("💡 可使用 Docker 指令查看或下載檔案：")
-                            print(f"   docker exec refactor-project-{project_id} ls {artifacts_path}")
-
-                    elif status == "FAILED":
-                        self.print_error(f"❌ Agent 執行失敗")
-                        error_msg = data.get("error_message")
-                        if error_msg:
-                            self.print_error(f"錯誤訊息: {error_msg}")
-
-                    elif status in ["RUNNING", "PENDING"]:
-                        self.print_info(f"ℹ️  Agent 仍在執行中（狀態: {status}）")
+            response = await self.client.get(
+                f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}",
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                status = data.get("status", "unknown")
 
-                    else:
-                        self.print_info(f"ℹ️  Agent 狀態: {status}")
+                # 根據狀態顯示不同訊息
+                if status == "SUCCESS":
+                    self.print_success(f"✅ Agent 執行成功！")
+
+                    # 提示可用的 artifacts
+                    artifacts_path = data.get("artifacts_path")
+                    if artifacts_path:
+                        self.print_info(f"📁 Artifacts 路徑: {artifacts_path}")
+                        self.print_info("💡 可使用 Docker 指令查看或下載檔案：")
+                        print(f"   docker exec refactor-project-{project_id} ls {artifacts_path}")
+
+                elif status == "FAILED":
+                    self.print_error(f"❌ Agent 執行失敗")
+                    error_msg = data.get("error_message")
+                    if error_msg:
+                        self.print_error(f"錯誤訊息: {error_msg}")
+
+                elif status in ["RUNNING", "PENDING"]:
+                    self.print_info(f"ℹ️  Agent 仍在執行中（狀態: {status}）")
 
                 else:
-                    self.print_warning(f"無法查詢狀態（HTTP {response.status_code}）")
+                    self.print_info(f"ℹ️  Agent 狀態: {status}")
+
+            else:
+                self.print_warning(f"無法查詢狀態（HTTP {response.status_code}）")
 
         except Exception as e:
             self.print_warning(f"查詢最終狀態失敗: {e}")
@@ -361,23 +385,22 @@ class RefactorCLI:
             return
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}",
-                    headers={"Authorization": f"Bearer {self.token}"}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    self.print_header(f"Agent 狀態 (Run ID: {run_id[:8]}...)")
-                    print(f"狀態: {data['status']}")
-                    print(f"建立時間: {data.get('created_at', 'N/A')}")
-                    print(f"開始時間: {data.get('started_at', 'N/A')}")
-                    print(f"結束時間: {data.get('finished_at', 'N/A')}")
-                    if data.get('error_message'):
-                        print(f"錯誤訊息: {data['error_message']}")
-                else:
-                    self.print_error(f"查詢狀態失敗: {response.text}")
+            response = await self.client.get(
+                f"{self.api_base_url}/api/v1/projects/{project_id}/agent/runs/{run_id}",
+                headers={"Authorization": f"Bearer {self.token}"}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                self.print_header(f"Agent 狀態 (Run ID: {run_id[:8]}...)")
+                print(f"狀態: {data['status']}")
+                print(f"建立時間: {data.get('created_at', 'N/A')}")
+                print(f"開始時間: {data.get('started_at', 'N/A')}")
+                print(f"結束時間: {data.get('finished_at', 'N/A')}")
+                if data.get('error_message'):
+                    print(f"錯誤訊息: {data['error_message']}")
+            else:
+                self.print_error(f"查詢狀態失敗: {response.text}")
         except Exception as e:
             self.print_error(f"查詢狀態錯誤: {e}")
 
@@ -440,19 +463,18 @@ async def handle_delete_project(cli: RefactorCLI):
         return
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.delete(
-                f"{cli.api_base_url}/api/v1/projects/{project_id}",
-                headers={"Authorization": f"Bearer {cli.token}"}
-            )
-
-            if response.status_code == 200:
-                cli.print_success(f"專案已刪除: {repo_name}")
-                if cli.current_project_id == project_id:
-                    cli.current_project_id = None
-            else:
-                error_msg = response.text if response.text else f"HTTP {response.status_code}"
-                cli.print_error(f"刪除失敗: {error_msg}")
+        response = await cli.client.delete(
+            f"{cli.api_base_url}/api/v1/projects/{project_id}",
+            headers={"Authorization": f"Bearer {cli.token}"}
+        )
+
+        if response.status_code == 200:
+            cli.print_success(f"專案已刪除: {repo_name}")
+            if cli.current_project_id == project_id:
+                cli.current_project_id = None
+        else:
+            error_msg = response.text if response.text else f"HTTP {response.status_code}"
+            cli.print_error(f"刪除失敗: {error_msg}")
     except Exception as e:
         cli.print_error(f"刪除錯誤: {e}")
 
@@ -464,16 +486,15 @@ async def handle_stop_project(cli: RefactorCLI):
         return
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{cli.api_base_url}/api/v1/projects/{cli.current_project_id}/stop",
-                headers={"Authorization": f"Bearer {cli.token}"}
-            )
+        response = await cli.client.post(
+            f"{cli.api_base_url}/api/v1/projects/{cli.current_project_id}/stop",
+            headers={"Authorization": f"Bearer {cli.token}"}
+        )
 
-            if response.status_code == 200:
-                cli.print_success("專案容器已停止")
-            else:
-                cli.print_error(f"停止失敗: {response.text}")
+        if response.status_code == 200:
+            cli.print_success("專案容器已停止")
+        else:
+            cli.print_error(f"停止失敗: {response.text}")
     except Exception as e:
         cli.print_error(f"停止錯誤: {e}")
 
@@ -489,34 +510,34 @@ async def handle_stream_logs(cli: RefactorCLI):
     if not run_id:
         # 取得最新的 run_id
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{cli.api_base_url}/api/v1/projects/{cli.current_project_id}/agent/runs",
-                    headers={"Authorization": f"Bearer {cli.token}"}
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    # API 返回格式: {"total": n, "runs": [...]}
-                    runs = data.get("runs", data.get("items", []))
-
-                    if runs and len(runs) > 0:
-                        # 取第一個 run 的 ID
-                        first_run = runs[0]
-                        run_id = first_run.get("id", first_run.get("run_id", first_run.get("task_id")))
-
-                        if run_id:
-                            cli.print_info(f"使用最新 Run ID: {run_id[:8]}...")
-                        else:
-                            cli.print_error("無法取得 Run ID（Run 記錄中缺少 ID）")
-                            cli.print_info(f"Run 資料: {first_run}")
-                            return
+            response = await cli.client.get(
+                f"{cli.api_base_url}/api/v1/projects/{cli.current_project_id}/agent/runs",
+                headers={"Authorization": f"Bearer {cli.token}"},
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                data = response.json()
+                # API 返回格式: {"total": n, "runs": [...]}
+                runs = data.get("runs", data.get("items", []))
+
+                if runs and len(runs) > 0:
+                    # 取第一個 run 的 ID
+                    first_run = runs[0]
+                    run_id = first_run.get("id", first_run.get("run_id", first_run.get("task_id")))
+
+                    if run_id:
+                        cli.print_info(f"使用最新 Run ID: {run_id[:8]}...")
                     else:
-                        cli.print_error("沒有找到任何 Agent Run")
-                        cli.print_info("請先使用功能 6 執行 Agent")
+                        cli.print_error("無法取得 Run ID（Run 記錄中缺少 ID）")
+                        cli.print_info(f"Run 資料: {first_run}")
                         return
                 else:
-                    cli.print_error(f"取得 Run 列表失敗: HTTP {response.status_code}")
+                    cli.print_error("沒有找到任何 Agent Run")
+                    cli.print_info("請先使用功能 6 執行 Agent")
                     return
+            else:
+                cli.print_error(f"取得 Run 列表失敗: HTTP {response.status_code}")
+                return
         except Exception as e:
             cli.print_error(f"取得 Run 列表失敗: {e}")
             return
@@ -541,7 +562,15 @@ async def handle_agent_status(cli: RefactorCLI):
 async def interactive_mode():
     """互動模式"""
     cli = RefactorCLI()
+    try:
+        await _interactive_loop(cli)
+    finally:
+        # 結束時關閉共用連線池
+        await cli.aclose()
+
 
+async def _interactive_loop(cli: RefactorCLI):
+    """互動模式主迴圈"""
     # 預設測試帳號
     DEFAULT_EMAIL = "test@example.com"
     DEFAULT_PASSWORD = "testpass123"
@@ -12,6 +12,14 @@ interface Props {
   onTasksUpdate?: (tasks: Task[]) => void
 }
 
+// timestamp 可能是 epoch 奈秒整數（超出 Date 的毫秒範圍，需先換算）或 ISO 字串
+function formatLogTimestamp(timestamp: string | number): string {
+  const date = typeof timestamp === 'number'
+    ? new Date(timestamp / 1e6) // 奈秒 → 毫秒
+    : new Date(timestamp)
+  return date.toLocaleTimeString('zh-TW')
+}
+
 export function AgentLogStream({ projectId, runId, autoStart = true, onTasksUpdate }: Props) {
   const [logs, setLogs] = useState<AgentLogEvent[]>([])
   const [isStreaming, setIsStreaming] = useState(false)
@@ -264,7 +272,7 @@ function LogLine({ event }: { event: AgentLogEvent }) {
         <div className="flex-1 min-w-0 overflow-hidden">
           {timestamp && (
             <div className="text-xs text-gray-500 mb-1 font-sans">
-              {new Date(timestamp).toLocaleTimeString('zh-TW')}
+              {formatLogTimestamp(timestamp)}
             </div>
           )}
           <div className="break-words whitespace-pre-wrap">{displayContent}</div>
@@ -291,7 +299,7 @@ function ToolCallsDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <span className="font-sans text-gray-400">工具調用（無詳細資訊）</span>
@@ -320,7 +328,7 @@ function ToolCallsDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans">工具調用 ({calls.length})</div>
@@ -376,7 +384,7 @@ function WriteTodosCallDisplay({ event, call, allCalls }: { event: AgentLogEvent
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans flex items-center gap-2">
@@ -453,7 +461,7 @@ function ToolResultsDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <span className="font-sans text-gray-400">工具執行結果（無詳細資訊）</span>
@@ -482,7 +490,7 @@ function ToolResultsDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans">工具執行結果 ({execResults.length})</div>
@@ -587,7 +595,7 @@ function WriteTodosResultDisplay({ event, result, allResults }: { event: AgentLo
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans text-green-400">
@@ -726,7 +734,7 @@ function TokenUsageDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
 
@@ -826,7 +834,7 @@ function ResponseMetadataDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
 
@@ -906,7 +914,7 @@ function TodosDisplay({ event }: { event: AgentLogEvent }) {
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans">TODO 列表更新 ({todos.length})</div>
@@ -1069,7 +1077,7 @@ function RawDataDisplay({
           <div className="flex-1">
             {timestamp && (
               <div className="text-xs text-gray-500 mb-1 font-sans">
-                {new Date(timestamp).toLocaleTimeString('zh-TW')}
+                {formatLogTimestamp(timestamp)}
               </div>
             )}
             <div className="font-semibold font-sans text-sm mb-2">{type}</div>
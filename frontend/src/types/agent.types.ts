@@ -42,7 +42,8 @@ export interface AgentRunListResponse {
 }
 
 export interface AgentLogEvent {
-  timestamp?: string
+  // log 事件的 timestamp 可能是 ISO 字串（status 等）或 epoch 奈秒整數（串流日誌）
+  timestamp?: string | number
   type: 'llm_response' | 'ai_content' | 'tool_call' | 'tool_calls' | 'tool_result' | 'tools_execution' |
         'thinking' | 'log' | 'status' | 'token_usage' | 'response_metadata' | 'todo_update' | 'task_list' | 'event' | 'message'
   message?: string